@@ -15,21 +15,54 @@ python arxiv_manager_min.py --mode 1
 --output FILE      输出 JSON 路径（默认为 llm_hw_design_papers.json）
 --query  STRING    自定义检索词
 --max-results N    最多检索条数（默认 2000）
+--jobs N           并发查询线程数（默认 4，遇到 HTTP 429 自动减半）
+--source {api,oai} 数据源：api = arXiv 检索 API（默认），oai = OAI-PMH 批量收割
+--since DATE       OAI 模式的起始日期 YYYY-MM-DD（增量模式默认取已有 JSON 中最新的发表日期）
+--separate-queries API 模式下逐条执行各检索词（默认用 OR 合并为尽量少的几条检索，
+                   每组上限 = 组内检索词数 × max-results，至多 30000 条）
 
 依赖
 ----
-pip install arxiv>=2.0.0
+pip install tenacity
+pip install orjson # 可选，加速 JSON 读写（缺省时退回标准库 json）
+pip install lxml   # 可选，用 C 实现流式解析 Atom / OAI XML（缺省时退回标准库）
+pip install "httpx[http2]"  # 可选，所有 arXiv 请求复用同一个 HTTP/2 长连接（缺省时退回 urllib）
 """
 
+from __future__ import annotations
+
 import argparse
+import atexit
+import concurrent.futures
+import io
 import json
 import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from operator import itemgetter
+
+try:
+    from lxml import etree
+except ImportError:  # lxml 为可选依赖，标准库同样支持 iterparse
+    import xml.etree.ElementTree as etree
+
+try:
+    import orjson  # 可选依赖，大文件读写比标准库 json 快数倍
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # 可选依赖，用于跨查询复用 HTTP/2 长连接
+except ImportError:
+    httpx = None
 
-# 需要 arxiv 2.x
-import arxiv
-# 当 arXiv API 某一分页意外为空时会抛出此异常
-from arxiv import UnexpectedEmptyPageError
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 # 默认检索关键词集合（可按需修改）
 # DEFAULT_QUERIES = [
@@ -77,71 +110,487 @@ DEFAULT_QUERIES = [
 
 DEFAULT_OUTPUT = "_data/llm_hw_design_papers.json"
 DEFAULT_MAX_RESULTS = 2000
+# arXiv 检索 API 单条查询可翻页取回的结果上限；OR 合并后每组上限 = min(组内检索词数 × max_results, 该值)
+ARXIV_MAX_RESULTS = 30000
+# 合并后检索式经 URL 编码的长度上限，超过则拆成多组
+ARXIV_MAX_QUERY_CHARS = 3000
+# 与 JSON 同名的 URL 索引文件（按行排序的 URL 列表），用于免解析 JSON 的去重
+URL_INDEX_SUFFIX = ".urls.txt"
+URL_INDEX_HEADER = "#fingerprint "
+DEFAULT_JOBS = 4
+# arXiv 建议全局请求频率不超过 1 次 / 3 秒
+ARXIV_DELAY_SECONDS = 3
+# 被限流（HTTP 429）后请求间隔逐次加倍，超过该上限仍被限流则放弃
+ARXIV_MAX_DELAY_SECONDS = 24
+# arXiv 检索 API（Atom）
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ARXIV_PAGE_SIZE = 100   # 每次 API 调用返回条数
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+OPENSEARCH_NS = "{http://a9.com/-/spec/opensearch/1.1/}"
+# 瞬时错误（429 / 5xx / 网络）的重试次数与带抖动指数退避上限（秒）
+FETCH_MAX_ATTEMPTS = 5
+FETCH_BACKOFF_MAX = 60
+# arXiv 要求自动化客户端使用可识别的 User-Agent
+USER_AGENT = "LLMHWPaperBot/1.0 (+https://iamchenyuwang.github.io)"
+
+# --------- OAI-PMH 批量收割配置 ---------
+OAI_ENDPOINT = "http://export.arxiv.org/oai2"
+OAI_SET = "cs"
+# arXivRaw 比 arXiv 格式多出版本列表，可还原与 API 一致的带版本号 URL 和首版发表时间
+OAI_METADATA_PREFIX = "arXivRaw"
+OAI_NS = "{http://www.openarchives.org/OAI/2.0/}"
+ARXIV_RAW_NS = "{http://arxiv.org/OAI/arXivRaw/}"
+OAI_MAX_RETRIES = 5
+
+
+class RateLimiter:
+    """线程安全的简单令牌桶：所有线程共享，相邻两次请求至少间隔 interval 秒。"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def slow_down(self, factor: float = 2):
+        """把请求间隔放宽为原来的 factor 倍（被限流后调用），对所有共享该限速器的线程生效。"""
+        with self._lock:
+            self.interval *= factor
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    返回进程内共享的 httpx.Client（HTTP/2 + keep-alive），首次调用时创建；
+    未安装 httpx 时返回 None。所有查询线程的分页请求都复用这几条热连接，
+    省去每页一次的 TCP/TLS 握手。
+    """
+    global _http_client
+    if httpx is None:
+        return None
+    with _http_client_lock:
+        if _http_client is None:
+            try:
+                _http_client = httpx.Client(
+                    http2=True,
+                    headers={"User-Agent": USER_AGENT},
+                    limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+                    timeout=60,
+                )
+            except ImportError:  # 未安装 h2 时退回 HTTP/1.1 keep-alive
+                _http_client = httpx.Client(
+                    headers={"User-Agent": USER_AGENT},
+                    limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+                    timeout=60,
+                )
+            atexit.register(_http_client.close)
+        return _http_client
+
+
+class ArxivAPIError(Exception):
+    """arXiv 检索 API 返回非 200 状态码。"""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} ({url})")
+        self.status = status
+
+
+class EmptyPageError(Exception):
+    """结果尚未取完（start < totalResults）时 arXiv 却返回了空白分页，通常重试即可恢复。"""
+
+
+def _http_get(url: str, params, timeout: float = 60):
+    """
+    发起一次 GET 请求并返回 (状态码, 响应体, 响应头)。优先使用共享的 httpx 连接池，
+    未安装 httpx 时退回 urllib；两种方式都带 USER_AGENT。网络层错误统一转为 ConnectionError 以便重试。
+    """
+    http_client = get_http_client()
+    if http_client is not None:
+        try:
+            response = http_client.get(url, params=params, timeout=timeout)
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+        return response.status_code, response.content, response.headers
+
+    request = urllib.request.Request(url + "?" + urllib.parse.urlencode(params),
+                                     headers={"User-Agent": USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, b"", e.headers
+    except urllib.error.URLError as e:
+        raise ConnectionError(str(e.reason)) from e
+
+
+def _parse_atom_entry(entry) -> dict:
+    """把 Atom <entry> 元素转换为结果字典（字段与 JSON 清单一致）。"""
+    return {
+        # 标题在 Atom 中常会折行，与 arxiv 库一致地把连续空白折叠为单个空格
+        "title": " ".join(entry.findtext(f"{ATOM_NS}title", "").split()),
+        "url": entry.findtext(f"{ATOM_NS}id", "").strip(),
+        "abstract": entry.findtext(f"{ATOM_NS}summary", "").strip().replace("\n", " "),
+        # arXiv 的 <published> 已是 UTC 的 YYYY-MM-DDTHH:MM:SSZ
+        "published": entry.findtext(f"{ATOM_NS}published", "").strip(),
+    }
+
+
+def _is_transient_error(exc: BaseException) -> bool:
+    """429、5xx、空白分页与网络层错误视为瞬时错误，值得退避后重试；其它 HTTP 错误（如 400）不重试。"""
+    if isinstance(exc, ArxivAPIError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (EmptyPageError, ConnectionError, TimeoutError))
 
 
-def fetch_papers(query: str, max_results: int = DEFAULT_MAX_RESULTS):
+def _log_retry(retry_state):
+    print(f"  ⚠️  第 {retry_state.attempt_number} 次请求失败（{retry_state.outcome.exception()}），"
+          f"{retry_state.next_action.sleep:.1f}s 后从断点继续……")
+
+
+def fetch_papers(query: str, max_results: int = DEFAULT_MAX_RESULTS,
+                 limiter: RateLimiter | None = None):
     """
     迭代返回符合查询的 arXiv 结果字典（按发表时间倒序）。
 
-    使用 arxiv.Client 取代已弃用的 Search.results()
+    直接请求 arXiv 检索 API，并用 iterparse 逐条流式解析 Atom 分页：每解析完一个
+    <entry> 就立即返回并释放该元素，无需先为整页构建 feedparser 对象。
+    若提供 limiter，则由它统一控制多线程下的全局请求频率。
+    遇到瞬时错误时按带抖动的指数退避重试，并以已返回的条数为偏移量从断点续取；
+    重试耗尽后若仍为 HTTP 429，则向上抛出 ArxivAPIError，交由调用方降低并发后重试。
     """
-    search = arxiv.Search(
-        query=query,
-        max_results=max_results,
-        sort_by=arxiv.SortCriterion.SubmittedDate,
-        sort_order=arxiv.SortOrder.Descending,
-    )
-
-    client = arxiv.Client(
-        page_size=100,      # 每次 API 调用返回条数
-        delay_seconds=3,    # 遵守 arXiv 速率限制
+    if limiter is None:
+        limiter = RateLimiter(ARXIV_DELAY_SECONDS)   # 遵守 arXiv 速率限制
+
+    retrying = Retrying(
+        stop=stop_after_attempt(FETCH_MAX_ATTEMPTS),
+        wait=wait_random_exponential(multiplier=ARXIV_DELAY_SECONDS, max=FETCH_BACKOFF_MAX),
+        retry=retry_if_exception(_is_transient_error),
+        before_sleep=_log_retry,
+        reraise=True,
     )
 
     count = 0
+    total = None
     try:
-        for result in client.results(search):
-            if count == 0:
-                print(f'  Fetching for "{query}"...')
-            count += 1
-            if count > 0 and count % 100 == 0:
-                print(f"  ... fetched {count} results so far.")
-            yield {
-                "title": result.title.strip(),
-                "url": result.entry_id,
-                "abstract": result.summary.strip().replace("\n", " "),
-                "published": result.published.replace(tzinfo=timezone.utc)
-                             .strftime("%Y-%m-%dT%H:%M:%SZ"),
-            }
-        
+        for attempt in retrying:
+            with attempt:
+                # count 即续取游标：重试时跳过已经返回过的结果
+                while count < max_results and (total is None or count < total):
+                    params = {
+                        "search_query": query,
+                        "start": count,
+                        "max_results": min(ARXIV_PAGE_SIZE, max_results - count),
+                        "sortBy": "submittedDate",
+                        "sortOrder": "descending",
+                    }
+                    limiter.wait()
+                    status, content, _ = _http_get(ARXIV_API_URL, params)
+                    if status != 200:
+                        raise ArxivAPIError(status, ARXIV_API_URL)
+
+                    page_count = 0
+                    for _, elem in etree.iterparse(io.BytesIO(content), events=("end",)):
+                        if elem.tag == f"{OPENSEARCH_NS}totalResults":
+                            total = int(elem.text)
+                        elif elem.tag == f"{ATOM_NS}entry":
+                            item = _parse_atom_entry(elem)
+                            elem.clear()
+                            if count == 0:
+                                print(f'  Fetching for "{query}"...')
+                            page_count += 1
+                            count += 1
+                            if count % 100 == 0:
+                                print(f"  ... fetched {count} results so far.")
+                            yield item
+
+                    if page_count == 0:
+                        if total is not None and count < total:
+                            raise EmptyPageError(f"empty page at start={count} of {total}")
+                        break
+
         if count > 0:
             print(f"  Finished query. Found {count} papers.")
         else:
             print(f"  No results for query.")
 
-    except UnexpectedEmptyPageError as e:
-        # 某些分页可能因 arXiv API 状态异常返回空白，此时直接跳过当前关键词
-        # 在 arxiv >= 2.1.0 中，当结果总数是 page_size 的整数倍时，
-        # 在取完最后一页后会触发此“异常”，但这属于正常行为。
-        # 我们在此处捕获它并直接忽略，以允许生成器正常退出。
+    except EmptyPageError:
+        # arXiv API 偶尔在结果未取完时持续返回空白分页；重试耗尽后保留已取到的结果，结束当前关键词
         print(f"  Query finished (hit an empty page). Found {count} papers.")
-        pass
+    except ArxivAPIError as e:
+        if e.status == 429:
+            raise
+        print(f"⚠️  检索 [{query}] 时发生错误，已跳过：{e}")
     except Exception as e:
         # 捕获其它未知错误，保证脚本不中断
         print(f"⚠️  检索 [{query}] 时发生错误，已跳过：{e}")
 
 
+_QUERY_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+
+def compile_query(query: str):
+    """
+    把 arXiv 布尔检索式（AND / OR / 括号 / 引号短语）编译为 text -> bool 的谓词。
+
+    OAI-PMH 不支持服务端关键词检索，因此 OAI 模式下用它在客户端过滤标题和摘要。
+    词项按整词、忽略大小写匹配；相邻词项之间默认为 AND。
+    """
+    tokens = _QUERY_TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def parse_or():
+        nonlocal pos
+        terms = [parse_and()]
+        while peek() == "OR":
+            pos += 1
+            terms.append(parse_and())
+        return terms[0] if len(terms) == 1 else (lambda text: any(t(text) for t in terms))
+
+    def parse_and():
+        nonlocal pos
+        terms = [parse_atom()]
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                pos += 1
+            terms.append(parse_atom())
+        return terms[0] if len(terms) == 1 else (lambda text: all(t(text) for t in terms))
+
+    def parse_atom():
+        nonlocal pos
+        token = peek()
+        if token is None:
+            raise ValueError(f"检索式不完整：{query}")
+        pos += 1
+        if token == "(":
+            expr = parse_or()
+            if peek() != ")":
+                raise ValueError(f"括号不匹配：{query}")
+            pos += 1
+            return expr
+        phrase = token.strip('"')
+        pattern = re.compile(r"\b" + r"\s+".join(map(re.escape, phrase.split())) + r"\b", re.IGNORECASE)
+        return lambda text: pattern.search(text) is not None
+
+    expr = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"无法解析检索式：{query}")
+    return expr
+
+
+def _oai_request(params, limiter: RateLimiter) -> bytes:
+    """
+    发起一次 OAI-PMH 请求并返回响应体。与检索 API 一样经由 _http_get（USER_AGENT、共享
+    httpx 连接池）并受 limiter 限速；503 流控按 Retry-After 等待，其它 429 / 5xx /
+    网络错误按指数退避重试，其余 HTTP 错误直接抛出。
+    """
+    for attempt in range(1, OAI_MAX_RETRIES + 1):
+        limiter.wait()
+        retry_after = None
+        try:
+            status, content, headers = _http_get(OAI_ENDPOINT, params, timeout=120)
+            if status == 200:
+                return content
+            error = ArxivAPIError(status, OAI_ENDPOINT)
+            retry_after = headers.get("Retry-After") if headers is not None else None
+        except ConnectionError as e:
+            error = e
+        if not _is_transient_error(error) or attempt == OAI_MAX_RETRIES:
+            raise error
+        if retry_after and retry_after.strip().isdigit():
+            wait = int(retry_after)
+        else:
+            wait = min(FETCH_BACKOFF_MAX, ARXIV_DELAY_SECONDS * 2 ** attempt)
+        print(f"  ⚠️  OAI 请求失败（{error}），{wait:.0f}s 后重试……")
+        time.sleep(wait)
+
+
+def _parse_oai_record(record):
+    """把 arXivRaw 格式的 <record> 元素转换为与 fetch_papers 相同的字典；已删除的记录返回 None。"""
+    meta = record.find(f"{OAI_NS}metadata/{ARXIV_RAW_NS}arXivRaw")
+    if meta is None:
+        return None
+    versions = meta.findall(f"{ARXIV_RAW_NS}version")
+    first_date = parsedate_to_datetime(versions[0].findtext(f"{ARXIV_RAW_NS}date"))
+    return {
+        "title": " ".join(meta.findtext(f"{ARXIV_RAW_NS}title", "").split()),
+        "url": f"http://arxiv.org/abs/{meta.findtext(f'{ARXIV_RAW_NS}id')}{versions[-1].get('version')}",
+        "abstract": meta.findtext(f"{ARXIV_RAW_NS}abstract", "").strip().replace("\n", " "),
+        "published": first_date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def fetch_papers_oai(since_date: str, queries):
+    """
+    通过 OAI-PMH ListRecords 批量收割 since_date 以来有更新的 cs 论文，
+    在客户端按 queries 过滤后逐条返回结果字典。
+
+    每次响应包含上千条记录，并以 resumptionToken 翻页，往返次数远少于检索 API；
+    响应体以 iterparse 流式解析，逐条释放已处理的元素。
+    """
+    matchers = [compile_query(q) for q in queries]
+    params = {
+        "verb": "ListRecords",
+        "from": since_date,
+        "set": OAI_SET,
+        "metadataPrefix": OAI_METADATA_PREFIX,
+    }
+    print(f'  Harvesting set "{OAI_SET}" via OAI-PMH since {since_date}...')
+
+    limiter = RateLimiter(ARXIV_DELAY_SECONDS)
+    scanned = matched = 0
+    while params:
+        token = None
+        content = _oai_request(params, limiter)
+        for _, elem in etree.iterparse(io.BytesIO(content), events=("end",)):
+            if elem.tag == f"{OAI_NS}record":
+                item = _parse_oai_record(elem)
+                elem.clear()
+                if item is None:
+                    continue
+                scanned += 1
+                text = item["title"] + " " + item["abstract"]
+                if any(m(text) for m in matchers):
+                    matched += 1
+                    yield item
+            elif elem.tag == f"{OAI_NS}resumptionToken":
+                token = (elem.text or "").strip()
+            elif elem.tag == f"{OAI_NS}error" and elem.get("code") != "noRecordsMatch":
+                raise RuntimeError(f"OAI-PMH error [{elem.get('code')}]: {elem.text}")
+
+        print(f"  ... scanned {scanned} records, {matched} matched so far.")
+        if not token:
+            break
+        params = {"verb": "ListRecords", "resumptionToken": token}
+
+    print(f"  Finished harvest. Found {matched} papers.")
+
+
+def combine_queries(queries, max_chars: int = ARXIV_MAX_QUERY_CHARS):
+    """
+    把多条检索词用 OR 合并为尽量少的几条检索式，由 arXiv 服务端完成并集与去重。
+
+    按顺序贪心分组，保证每组 URL 编码后的长度不超过 max_chars（arXiv 的 URL 长度限制）。
+    返回 (检索式, 组内检索词数) 列表，调用方据此为每组设置结果上限。
+    """
+    groups, current = [], []
+    for q in queries:
+        candidate = current + [q]
+        combined = " OR ".join(f"({c})" for c in candidate)
+        if current and len(urllib.parse.quote_plus(combined)) > max_chars:
+            groups.append(current)
+            candidate = [q]
+        current = candidate
+    if current:
+        groups.append(current)
+    return [(" OR ".join(f"({c})" for c in group) if len(group) > 1 else group[0], len(group))
+            for group in groups]
+
+
+def run_queries(queries, max_results: int, jobs: int = DEFAULT_JOBS):
+    """
+    用线程池并发执行多组查询，返回与 queries 顺序一致的结果列表（每项为 list[dict]）。
+    max_results 可以是统一的上限，也可以是与 queries 一一对应的上限列表。
+
+    所有线程共享一个 RateLimiter，由它决定总请求频率，因此仅减少线程数并不会放慢请求。
+    若某个查询触发 HTTP 429，则把共享限速器的请求间隔加倍（同时把并发数减半）后重跑该查询；
+    间隔已达 ARXIV_MAX_DELAY_SECONDS 仍被限流时放弃。
+    """
+    limiter = RateLimiter(ARXIV_DELAY_SECONDS)
+    results = [[] for _ in queries]
+    pending = list(range(len(queries)))
+    limits = max_results if isinstance(max_results, list) else [max_results] * len(queries)
+
+    def worker(i):
+        print(f"\n--- Running query {i+1}/{len(queries)} ---")
+        return list(fetch_papers(queries[i], limits[i], limiter))
+
+    while pending:
+        throttled = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(worker, i): i for i in pending}
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except ArxivAPIError as e:
+                    print(f"⚠️  检索 [{queries[i]}] 遇到 HTTP {e.status}（请求过多）")
+                    throttled.append(i)
+
+        if throttled and limiter.interval >= ARXIV_MAX_DELAY_SECONDS:
+            print(f"⚠️  请求间隔已放宽到 {limiter.interval:g}s 仍被限流，放弃 {len(throttled)} 组查询。")
+            break
+        if throttled:
+            limiter.slow_down()
+            jobs = max(1, jobs // 2)
+            print(f"将请求间隔放宽到 {limiter.interval:g}s、并发数降为 {jobs}，重试 {len(throttled)} 组查询……")
+        pending = sorted(throttled)
+
+    return results
+
+
 def load_existing(path: str):
     """读取已有 JSON，返回列表和已存在的 URL 集合。"""
     if not os.path.isfile(path):
         return [], set()
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if orjson is not None:
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
     return data, {item["url"] for item in data}
 
 
+def latest_published_date(data):
+    """返回已有记录中最新的发表日期（YYYY-MM-DD），无记录时返回 None。"""
+    dates = [item["published"][:10] for item in data if item.get("published")]
+    return max(dates) if dates else None
+
+
+def file_fingerprint(path: str) -> str:
+    """用文件大小与纳秒级 mtime 标识 JSON 的当前内容。"""
+    st = os.stat(path)
+    return f"{st.st_size} {st.st_mtime_ns}"
+
+
+def load_url_index(path: str):
+    """
+    读取 JSON 旁的 URL 索引文件并返回 URL 集合。索引首行记录了生成时 JSON 的指纹，
+    索引不存在或指纹与当前 JSON 不符（被编辑、还原或 checkout 过）时返回 None。
+    """
+    index_path = path + URL_INDEX_SUFFIX
+    if not os.path.isfile(path) or not os.path.isfile(index_path):
+        return None
+    with open(index_path, "r", encoding="utf-8") as f:
+        header, *urls = f.read().splitlines() or [""]
+    if header != URL_INDEX_HEADER + file_fingerprint(path):
+        return None
+    return set(urls)
+
+
 def save_json(path: str, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    # 同步刷新 URL 索引（首行为 JSON 指纹），供下次增量运行直接判断“是否有新论文”
+    with open(path + URL_INDEX_SUFFIX, "w", encoding="utf-8") as f:
+        f.write("\n".join([URL_INDEX_HEADER + file_fingerprint(path)] + sorted(item["url"] for item in data)))
     print(f"✓ 写入 {len(data)} 条记录 → {path}")
 
 
@@ -156,6 +605,17 @@ def main():
                         help="自定义检索词（可重复使用）。若省略则使用脚本内置的默认集合。")
     parser.add_argument("--max-results", type=int, default=DEFAULT_MAX_RESULTS,
                         help="最大检索条数（默认 2000）")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help="并发查询线程数（默认 4）")
+    parser.add_argument("--source", choices=["api", "oai"], default="api",
+                        help="api = arXiv 检索 API（默认）, oai = OAI-PMH 批量收割（忽略 --max-results/--jobs）")
+    parser.add_argument("--since",
+                        help="OAI 模式的起始日期 YYYY-MM-DD（mode 1 默认取已有 JSON 中最新的发表日期）")
+    parser.add_argument("--separate-queries", action="store_true",
+                        help="API 模式下逐条执行各检索词，而不是用 OR 合并。合并检索每组最多取回 "
+                             "组内检索词数 × --max-results 条（且不超过 arXiv 的 30000 条），超出时保留的是"
+                             "整组最新的论文，而不是每个检索词各自最新的 --max-results 条；"
+                             "需要逐词完整覆盖时使用本选项")
     args = parser.parse_args()
 
     # 若未显式提供 --query，则使用脚本预设 DEFAULT_QUERIES
@@ -165,21 +625,39 @@ def main():
     for q in queries:
         print(f"  - {q}")
 
-    # 依次执行多组查询，并按 URL 去重
-    new_items = []
-    seen_urls = set()
-    total_queries = len(queries)
-    for i, q in enumerate(queries):
-        print(f"\n--- Running query {i+1}/{total_queries} ---")
-        for item in fetch_papers(q, args.max_results):
-            if item["url"] in seen_urls:
-                continue
-            new_items.append(item)
-            seen_urls.add(item["url"])
-
-    print(f"\nTotal unique papers fetched: {len(new_items)}")
-    # 按发布时间倒序排列（ISO 字符串直接比较即可）
-    new_items.sort(key=lambda x: x["published"], reverse=True)
+    # mode 1 先只读 URL 索引用于去重；完整 JSON 仅在需要时才解析
+    # （OAI 模式需要其中最新的发表日期，或确实有新论文需要合并）
+    existing_data, existing_urls = None, set()
+    if args.mode == 1:
+        existing_urls = load_url_index(args.output)
+        if existing_urls is None or (args.source == "oai" and not args.since):
+            existing_data, existing_urls = load_existing(args.output)
+
+    if args.source == "oai":
+        since = args.since or latest_published_date(existing_data or [])
+        if since is None:
+            parser.error("--source oai 需要 --since（或 mode 1 下已有非空 JSON）")
+        results = [fetch_papers_oai(since, queries)]
+    elif args.separate_queries:
+        # 并发执行多组查询
+        results = run_queries(queries, args.max_results, args.jobs)
+    else:
+        # 合并为少数几条 OR 检索，减少分页请求与限速等待
+        combined = combine_queries(queries)
+        print(f"Combined {len(queries)} queries into {len(combined)} arXiv search(es).")
+        # 每组上限随组内检索词数增长，mode 0 全量重建时不会因上限过低丢掉旧论文
+        limits = [min(n * args.max_results, ARXIV_MAX_RESULTS) for _, n in combined]
+        results = run_queries([q for q, _ in combined], limits, args.jobs)
+
+    # 在主线程中以 URL 为键去重（保留首次出现的条目）
+    unique = {}
+    for items in results:
+        for item in items:
+            unique.setdefault(item["url"], item)
+
+    print(f"\nTotal unique papers fetched: {len(unique)}")
+    # 按发布时间倒序排列（ISO 字符串直接比较即可；itemgetter 在 C 层取键，无逐元素 lambda 调用）
+    new_items = sorted(unique.values(), key=itemgetter("published"), reverse=True)
 
     if args.mode == 0:
         # 覆盖写入
@@ -189,22 +667,18 @@ def main():
 
     # mode == 1 → 读旧文件，去重后追加
     print(f"\nMode 1: Merging with existing file at {args.output}...")
-    existing_data, existing_urls = load_existing(args.output)
-    print(f"Loaded {len(existing_data)} existing papers.")
+    print(f"Loaded {len(existing_urls)} existing paper URLs.")
     
-    add_count = 0
-    merged = []
-
     # 先把新的（不在 existing_urls 的）条目放到前面
-    for item in new_items:
-        if item["url"] not in existing_urls:
-            merged.append(item)
-            add_count += 1
+    merged = [item for item in new_items if item["url"] not in existing_urls]
+    add_count = len(merged)
 
-    merged.extend(existing_data)  # 旧记录放后面
     if add_count == 0:
         print("没有发现新论文，JSON 未修改。")
     else:
+        if existing_data is None:
+            existing_data, _ = load_existing(args.output)
+        merged.extend(existing_data)  # 旧记录放后面
         print(f"Adding {add_count} new papers.")
         save_json(args.output, merged)
 
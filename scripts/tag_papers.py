@@ -8,45 +8,104 @@ assigns one to three granular tags (e.g., 'Verification', 'Synthesis') to each.
 
 Usage Example
 -------------
-# Tag all un-tagged papers using the default model gpt-4o
+# Tag all un-tagged papers using the default model gpt-4o-mini
 python tag_papers.py --input _data/filter_papers.json \
                      --output _data/tagged_papers.json
 
+# Before switching models, measure agreement with an already-tagged file
+python tag_papers.py --tier fast --eval-accuracy _data/tagged_papers.json
+
 Optional Arguments
 ------------------
 --input FILE       Input JSON (default: _data/filter_papers.json)
 --output FILE      Output JSON (default: _data/tagged_papers.json)
---model MODEL      OpenAI model name (default: gpt-4o, can be changed to gpt-3.5-turbo, etc.)
+--model MODEL      OpenAI model name (default: gpt-4o-mini; the model must support structured outputs)
+--tier TIER        Shorthand for --model: 'fast' (gpt-4o-mini, default) or 'accurate' (gpt-4o)
+--eval-accuracy FILE
+                   Re-tag a sample of the papers in FILE, report the multi-label accuracy against
+                   their existing 'tags', and exit without writing any output
+--eval-sample N    Number of papers sampled for --eval-accuracy (default: 200)
+--cache-file FILE  sqlite cache of model answers keyed by (model, prompt) (default: _data/.tags.sqlite;
+                   pass '' to disable)
+--rpm N / --tpm N  Starting requests/tokens-per-minute budget (default: 500 / 200000); raised or
+                   lowered to the account's real limits from the first response's headers
+--papers-per-request K
+                   Tag up to K papers per chat request, sharing the system prompt (default: 10;
+                   groups are also capped at ~6000 input tokens; 1 = one paper per request)
+--max-abstract-tokens N
+                   Truncate abstracts to their first N tokens before prompting (default: 200; 0 = no limit)
+--jobs N           Maximum number of in-flight API requests (default: 20)
 --overwrite        Force re-evaluation even if the 'tags' field exists
+--batch            Use the OpenAI Batch API (half price, results within 24h) instead of
+                   concurrent requests; ignored for fewer than 100 papers
 
 Environment Dependencies
 ------------------------
 1. python -m pip install openai>=1.13.3
+   (optional) python -m pip install "httpx[http2]"  # multiplex all requests over one connection
 2. Set environment variable OPENAI_API_KEY=<key>
 """
 
 from __future__ import annotations
 
 import argparse
-import concurrent.futures
+import asyncio
+import atexit
+import collections
+import hashlib
+import itertools
 import json
 import os
+import random
+import re
+import sqlite3
 import sys
-import threading
+import tempfile
 import time
-from typing import List, Dict, Any
-
-import openai
-from openai import OpenAI
-from openai._exceptions import OpenAIError
+import weakref
+from operator import itemgetter
+from typing import TYPE_CHECKING, BinaryIO, List, Dict, Any, Final, Optional, Tuple
+
+# openai (with httpx and pydantic) takes ~0.5s to import, and most scheduled runs find
+# nothing new to tag, so it is imported only by the functions that talk to the API.
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI, OpenAIError
+
+try:
+    import orjson  # Optional: several times faster JSON I/O on the corpus files
+except ImportError:
+    orjson = None
+
+try:
+    import tiktoken  # Optional: exact token counts for the rate-limit budget and abstract truncation
+except ImportError:
+    tiktoken = None
 
 # ---------------------------------- Configuration ----------------------------------
 DEFAULT_INPUT = "_data/filter_papers.json"
 DEFAULT_OUTPUT = "_data/tagged_papers.json"
-DEFAULT_MODEL = "gpt-4o"
-MAX_RETRY = 3
-RETRY_BACKOFF_SEC = 5
+# A 9-way tagging task does not need the large model; 'accurate' stays available via --tier.
+# Pinned snapshots, so that silent model revisions don't invalidate the answer cache.
+MODEL_TIERS = {"fast": "gpt-4o-mini-2024-07-18", "accurate": "gpt-4o-2024-08-06"}
+DEFAULT_MODEL = MODEL_TIERS["fast"]
+DEFAULT_EVAL_SAMPLE = 200
+SHARED_CLIENT_JOBS = 32  # Pool size of the shared clients used when callers don't pass their own
+PART_SUFFIX = ".jsonl.part"  # Tagged papers are appended here as they finish, so a killed run can resume
+MAX_RETRY = 6
+RETRY_BACKOFF_SEC = 0.5  # Base of the full-jitter backoff: caps grow 1s, 2s, 4s, ... up to RETRY_BACKOFF_CAP_SEC
+RETRY_BACKOFF_CAP_SEC = 60.0
 DEFAULT_API_KEY_FILE = "secrets/api_key.json"
+DEFAULT_CACHE_FILE = "_data/.tags.sqlite"
+DEFAULT_RPM = 500  # Conservative starting budget; RateLimiter adopts the account's real limits from headers
+DEFAULT_TPM = 200_000
+DEFAULT_MAX_ABSTRACT_TOKENS = 200  # The opening sentences carry the signal for a coarse 9-way label
+COMPLETION_TOKENS_ESTIMATE = 30  # A three-tag JSON answer, per paper; used only for the tokens-per-minute budget
+DEFAULT_PAPERS_PER_REQUEST = 10
+MICRO_BATCH_MAX_INPUT_TOKENS = 6000  # Papers per request stop growing once their prompts reach this
+BATCH_MIN_ITEMS = 100  # Below this, batch turnaround dominates; use concurrent requests
+BATCH_POLL_SEC = 60
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
 
 VALID_TAGS = [
     "Verification",
@@ -60,96 +119,753 @@ VALID_TAGS = [
     "Other",
 ]
 
+# Structured output: the API guarantees the answer parses as {"tags": [...]} with 1-3 tags from VALID_TAGS
+_TAGS_SCHEMA = {
+    "type": "array",
+    "minItems": 1,
+    "maxItems": 3,
+    "items": {"type": "string", "enum": VALID_TAGS},
+}
+TAGS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "tags",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"tags": _TAGS_SCHEMA},
+            "required": ["tags"],
+            "additionalProperties": False,
+        },
+    },
+}
+# Several papers per request: {"results": [{"id": <number in brackets>, "tags": [...]}, ...]}
+RESULTS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "tag_results",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"id": {"type": "integer"}, "tags": _TAGS_SCHEMA},
+                        "required": ["id", "tags"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        },
+    },
+}
+
 # ------------------------------ Core Functions -----------------------------------
 
-def build_prompt(title: str, abstract: str) -> List[Dict[str, str]]:
-    """Constructs the messages required for Chat Completion."""
-    system_msg = (
-        "You are an expert research assistant specializing in computer architecture and hardware design. "
-        "Your task is to assign between one and three most-fitting category tags to academic papers based on their title and abstract.\n\n"
-        "The paper is known to be in the 'AI for Systems/Architecture/Hardware' domain. You must choose one to three tags from the following list that best describe the paper's primary contributions. If only one tag fits, provide only one. Do not force multiple tags if they are not relevant.\n"
-        f"Available tags: `{'`, `'.join(VALID_TAGS)}`\n\n"
-        "Here are explanations for each tag:\n"
-        "- **Verification**: Using AI/ML for formal verification, simulation, or validation of hardware designs.\n"
-        "- **Synthesis**: Using AI/ML for high-level synthesis (HLS), logic synthesis, or generating hardware from high-level descriptions.\n"
-        "- **P&R**: Using AI/ML for physical design tasks like placement, routing, and clock tree synthesis.\n"
-        "- **Analog Design**: Using AI/ML for the design, optimization, or layout of analog, RF, or mixed-signal circuits.\n"
-        "- **System-level Optimization**: Using AI/ML to optimize system-level concerns like architecture, power, performance, or resource management (e.g., cache policies, NoC routing, memory controllers).\n"
-        "- **Code Generation**: Using AI/ML to generate or optimize hardware description languages (e.g., Verilog, VHDL) or related code.\n"
-        "- **Security**: Using AI/ML to address hardware security challenges, such as detecting vulnerabilities, side-channel attacks, or Trojans.\n"
-        "- **Testing**: Using AI/ML for post-silicon validation, test pattern generation, or fault diagnosis.\n"
-        "- **Other**: If the paper's main contribution does not fit well into any of the above categories.\n\n"
-        "--- EXAMPLE 1 ---\n"
-        'Title: "A Deep-Learning-Based Framework for Routing Congestion Prediction in High-Performance Processors"\n'
-        'Abstract: "We propose a novel framework that uses a convolutional neural network to predict routing congestion hotspots early in the physical design flow..."\n'
-        "Correct Answer: P&R\n\n"
-        "--- EXAMPLE 2 ---\n"
-        'Title: "Automated Microarchitectural Design Space Exploration using Reinforcement Learning"\n'
-        'Abstract: "This work presents a reinforcement learning agent that navigates the vast design space of modern CPUs, simultaneously optimizing for power and performance by adjusting cache sizes and branch predictor strategies."\n'
-        "Correct Answer: System-level Optimization\n\n"
-        "--- EXAMPLE 3 ---\n"
-        'Title: "Leveraging Large Language Models for Automatic Generation and Verification of RTL Modules"\n'
-        'Abstract: "We introduce a novel method where an LLM generates Verilog code from natural language. The same model is then prompted to generate SystemVerilog assertions to create a self-contained verification environment."\n'
-        "Correct Answer: Code Generation, Verification\n"
-        "--- END OF EXAMPLES ---\n\n"
-        "Now, classify the following paper. Respond with one to three tags from the list, separated by commas."
-    )
+def load_json(path: str) -> Any:
+    """Reads a JSON file, using orjson when available."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dump_json(data: Any, path: str, fsync: bool = False) -> None:
+    """Writes data as indented UTF-8 JSON, using orjson when available; fsync forces it to disk."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class TagCache:
+    """
+    sqlite cache of raw model answers keyed by sha256(model + messages).
+
+    Answers are deterministic (temperature 0), so a paper seen before under the same
+    model and prompt never needs another API call. A changed prompt or model yields a
+    new key, so stale entries are never returned; `variant` marks answers obtained in a
+    different request format (e.g. several papers per request) so they get keys of their
+    own. Only the event-loop thread touches it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, answer TEXT, model TEXT, ts INT)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], variant: str = "") -> str:
+        return hashlib.sha256((model + variant + json.dumps(messages)).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT answer FROM cache WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, answer: str, model: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache(key, answer, model, ts) VALUES (?, ?, ?, ?)",
+            (key, answer, model, int(time.time())),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RateLimiter:
+    """
+    Shared token bucket for the requests-per-minute and tokens-per-minute limits.
+
+    Each request reserves one request and its estimated tokens before it is sent, so the
+    run paces itself below the limits instead of discovering them through 429s. Both
+    buckets refill continuously; `observe` re-syncs them with the x-ratelimit-* headers
+    of each response, and `pause` holds every request back after a Retry-After.
+    """
+
+    def __init__(self, rpm: float, tpm: float) -> None:
+        self.max_requests = float(rpm)
+        self.max_tokens = float(tpm)
+        self.available_requests = self.max_requests
+        self.available_tokens = self.max_tokens
+        self._last = time.monotonic()
+        self._resume_at = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        self.available_requests = min(self.max_requests, self.available_requests + elapsed * self.max_requests / 60.0)
+        self.available_tokens = min(self.max_tokens, self.available_tokens + elapsed * self.max_tokens / 60.0)
+
+    async def acquire(self, tokens: int) -> None:
+        tokens = min(tokens, self.max_tokens)  # A single oversized request must still get through eventually
+        while True:
+            self._refill()
+            wait = self._resume_at - time.monotonic()
+            if wait <= 0:
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                wait = max((1 - self.available_requests) * 60.0 / self.max_requests,
+                           (tokens - self.available_tokens) * 60.0 / self.max_tokens)
+            await asyncio.sleep(wait)
+
+    def observe(self, headers: httpx.Headers) -> None:
+        """Adopts the limits and remaining budget reported by the API."""
+        try:
+            if "x-ratelimit-limit-requests" in headers:
+                self.max_requests = float(headers["x-ratelimit-limit-requests"])
+            if "x-ratelimit-limit-tokens" in headers:
+                self.max_tokens = float(headers["x-ratelimit-limit-tokens"])
+            self._refill()
+            if "x-ratelimit-remaining-requests" in headers:
+                self.available_requests = min(self.available_requests, float(headers["x-ratelimit-remaining-requests"]))
+            if "x-ratelimit-remaining-tokens" in headers:
+                self.available_tokens = min(self.available_tokens, float(headers["x-ratelimit-remaining-tokens"]))
+        except ValueError:  # Malformed header; keep the local estimate
+            pass
+
+    def pause(self, seconds: float) -> None:
+        """Holds back all requests for `seconds` (e.g. the Retry-After of a 429)."""
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
 
+def count_tokens(text: str, model: str) -> int:
+    """Token count of text for model; ~4 characters per token without tiktoken."""
+    encoding = _encoding_for(model)
+    return len(encoding.encode(text)) if encoding is not None else len(text) // 4
+
+
+def estimate_tokens(messages: List[Dict[str, str]], model: str,
+                    completion_tokens: int = COMPLETION_TOKENS_ESTIMATE) -> int:
+    """Prompt tokens plus the completion budget."""
+    return count_tokens("".join(m["content"] for m in messages), model) + completion_tokens
+
+
+_ENCODINGS: Dict[str, Any] = {}
+
+
+def _encoding_for(model: str) -> Optional["tiktoken.Encoding"]:
+    if tiktoken is None:
+        return None
+    if model not in _ENCODINGS:
+        try:
+            _ENCODINGS[model] = tiktoken.encoding_for_model(model)
+        except Exception:  # Unknown model, or the encoding file could not be fetched
+            _ENCODINGS[model] = None
+    return _ENCODINGS[model]
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Cuts text to its first max_tokens tokens (~4 characters per token, at a word break, without tiktoken)."""
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+    max_chars = max_tokens * 4
+    return text[:max_chars].rsplit(" ", 1)[0] if len(text) > max_chars else text
+
+
+def retry_after_seconds(error: OpenAIError) -> Optional[float]:
+    """Returns the Retry-After delay of an API error response, if the server sent one."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def append_part(part_file: BinaryIO, item: Dict[str, Any]) -> None:
+    """Durably appends one tagged paper to the JSONL part file."""
+    line = orjson.dumps(item) if orjson is not None else json.dumps(item, ensure_ascii=False).encode("utf-8")
+    part_file.write(line + b"\n")
+    part_file.flush()
+    os.fsync(part_file.fileno())
+
+
+def load_part(path: str) -> List[Dict[str, Any]]:
+    """Reads the papers tagged by an interrupted run; a torn last line is ignored."""
+    if not os.path.isfile(path):
+        return []
+    loads = orjson.loads if orjson is not None else json.loads
+    records = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                records.append(loads(line))
+            except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
+                continue
+    return records
+
+
+def skip_resumed(items: List[Dict[str, Any]], resumed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drops from `items` the rows already tagged in the part file. Rows are matched one for
+    one by URL, so an input listing a URL several times keeps the copies not yet written.
+    """
+    remaining = collections.Counter(item.get("url") for item in resumed)
+    pending = []
+    for item in items:
+        url = item.get("url")
+        if remaining[url] > 0:
+            remaining[url] -= 1
+            continue
+        pending.append(item)
+    return pending
+
+
+def normalize_ws(text: str) -> str:
+    """Collapses runs of whitespace so re-wrapped abstracts map to the same prompt (and cache key)."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_key(item: Dict[str, Any]) -> bytes:
+    """Identifies a paper by its normalized title and abstract, so re-listed copies compare equal."""
+    return hashlib.sha1(f"{normalize_ws(item['title'])}\n{normalize_ws(item['abstract'])}".encode("utf-8")).digest()
+
+
+# Identical for every paper and sent first, built once at import time. At ~650 tokens it is still
+# below the 1024-token minimum for OpenAI's automatic prompt caching.
+SYSTEM_MSG: Final[str] = (
+    "You are an expert research assistant specializing in computer architecture and hardware design. "
+    "Your task is to assign between one and three most-fitting category tags to academic papers based on their title and abstract.\n\n"
+    "The paper is known to be in the 'AI for Systems/Architecture/Hardware' domain. You must choose one to three tags from the following list that best describe the paper's primary contributions. If only one tag fits, provide only one. Do not force multiple tags if they are not relevant.\n"
+    f"Available tags: `{'`, `'.join(VALID_TAGS)}`\n\n"
+    "Here are explanations for each tag:\n"
+    "- **Verification**: Using AI/ML for formal verification, simulation, or validation of hardware designs.\n"
+    "- **Synthesis**: Using AI/ML for high-level synthesis (HLS), logic synthesis, or generating hardware from high-level descriptions.\n"
+    "- **P&R**: Using AI/ML for physical design tasks like placement, routing, and clock tree synthesis.\n"
+    "- **Analog Design**: Using AI/ML for the design, optimization, or layout of analog, RF, or mixed-signal circuits.\n"
+    "- **System-level Optimization**: Using AI/ML to optimize system-level concerns like architecture, power, performance, or resource management (e.g., cache policies, NoC routing, memory controllers).\n"
+    "- **Code Generation**: Using AI/ML to generate or optimize hardware description languages (e.g., Verilog, VHDL) or related code.\n"
+    "- **Security**: Using AI/ML to address hardware security challenges, such as detecting vulnerabilities, side-channel attacks, or Trojans.\n"
+    "- **Testing**: Using AI/ML for post-silicon validation, test pattern generation, or fault diagnosis.\n"
+    "- **Other**: If the paper's main contribution does not fit well into any of the above categories.\n\n"
+    "--- EXAMPLE 1 ---\n"
+    'Title: "A Deep-Learning-Based Framework for Routing Congestion Prediction in High-Performance Processors"\n'
+    'Abstract: "We propose a novel framework that uses a convolutional neural network to predict routing congestion hotspots early in the physical design flow..."\n'
+    "Correct Answer: P&R\n\n"
+    "--- EXAMPLE 2 ---\n"
+    'Title: "Automated Microarchitectural Design Space Exploration using Reinforcement Learning"\n'
+    'Abstract: "This work presents a reinforcement learning agent that navigates the vast design space of modern CPUs, simultaneously optimizing for power and performance by adjusting cache sizes and branch predictor strategies."\n'
+    "Correct Answer: System-level Optimization\n\n"
+    "--- EXAMPLE 3 ---\n"
+    'Title: "Leveraging Large Language Models for Automatic Generation and Verification of RTL Modules"\n'
+    'Abstract: "We introduce a novel method where an LLM generates Verilog code from natural language. The same model is then prompted to generate SystemVerilog assertions to create a self-contained verification environment."\n'
+    "Correct Answer: Code Generation, Verification\n"
+    "--- END OF EXAMPLES ---\n\n"
+    "Now, classify the following paper. Respond with one to three tags from the list."
+)
+_SYSTEM_MSG_ROLE: Final[Dict[str, str]] = {"role": "system", "content": SYSTEM_MSG}
+
+
+def build_prompt(title: str, abstract: str) -> List[Dict[str, str]]:
+    """Constructs the messages required for Chat Completion; the system message dict is shared, not copied."""
     user_msg = (
         f"Title: {title}\n"
         f"Abstract: {abstract}\n\n"
-        "What are the most appropriate tags for this paper? (1-3 tags, comma-separated)"
+        "What are the most appropriate tags for this paper? (1-3 tags)"
     )
 
-    return [
-        {"role": "system", "content": system_msg},
-        {"role": "user", "content": user_msg},
-    ]
+    return [_SYSTEM_MSG_ROLE, {"role": "user", "content": user_msg}]
+
 
+def paper_fields(item: Dict[str, Any], model: str,
+                 max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> Tuple[str, str]:
+    """Title and abstract as sent to the model: whitespace-normalized, abstract truncated (0 = no limit)."""
+    abstract = normalize_ws(item["abstract"])
+    if max_abstract_tokens:
+        abstract = truncate_tokens(abstract, max_abstract_tokens, model)
+    return normalize_ws(item["title"]), abstract
 
-def query_model(client: OpenAI, messages: List[Dict[str, str]], model: str = DEFAULT_MODEL) -> str:
-    """Calls OpenAI ChatCompletion, returns the result string."""
+
+def paper_messages(item: Dict[str, Any], model: str,
+                   max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> List[Dict[str, str]]:
+    """Builds the prompt for one paper."""
+    return build_prompt(*paper_fields(item, model, max_abstract_tokens))
+
+
+def build_group_prompt(items: List[Dict[str, Any]], model: str,
+                       max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> List[Dict[str, str]]:
+    """Builds one prompt listing several papers as [1], [2], ... under the shared system message."""
+    papers = []
+    for i, item in enumerate(items, 1):
+        title, abstract = paper_fields(item, model, max_abstract_tokens)
+        papers.append(f"[{i}] Title: {title}\nAbstract: {abstract}")
+    user_msg = (
+        f"Tag each of the following {len(items)} papers independently.\n\n"
+        + "\n\n".join(papers)
+        + "\n\nReturn one result per paper, with the number in brackets as its id and 1-3 tags."
+    )
+    return [_SYSTEM_MSG_ROLE, {"role": "user", "content": user_msg}]
+
+
+def group_papers(items: List[Dict[str, Any]], model: str, max_papers: int,
+                 max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> List[List[Dict[str, Any]]]:
+    """Splits items into request-sized groups of at most max_papers papers and ~MICRO_BATCH_MAX_INPUT_TOKENS."""
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for item in items:
+        tokens = count_tokens(" ".join(paper_fields(item, model, max_abstract_tokens)), model)
+        if current and (len(current) >= max_papers or current_tokens + tokens > MICRO_BATCH_MAX_INPUT_TOKENS):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def query_model(client: AsyncOpenAI, messages: List[Dict[str, str]], model: str = DEFAULT_MODEL,
+                      cache: Optional[TagCache] = None, limiter: Optional[RateLimiter] = None,
+                      response_format: Dict[str, Any] = TAGS_RESPONSE_FORMAT,
+                      completion_tokens: int = COMPLETION_TOKENS_ESTIMATE) -> str:
+    """
+    Calls OpenAI ChatCompletion, returns the result string (looked up in / stored to cache when given).
+    With a limiter, each attempt first reserves its share of the rate limits.
+    """
+    from openai import OpenAIError
+
+    key = None
+    if cache is not None:
+        key = cache.make_key(model, messages)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
     for attempt in range(1, MAX_RETRY + 1):
         try:
-            response = client.chat.completions.create(
+            if limiter is not None:
+                await limiter.acquire(estimate_tokens(messages, model, completion_tokens))
+            raw = await client.chat.completions.with_raw_response.create(
                 model=model,
                 messages=messages,
                 temperature=0.0,
-                max_tokens=40,  # Increased to allow for multiple tags
+                response_format=response_format,
             )
+            if limiter is not None:
+                limiter.observe(raw.headers)
+            response = raw.parse()
             ans = response.choices[0].message.content.strip()
+            if cache is not None:
+                cache.put(key, ans, model)
             return ans
         except OpenAIError as e:
             if attempt == MAX_RETRY:
                 raise
-            # Exponential backoff
-            wait = RETRY_BACKOFF_SEC * attempt
-            print(f"⚠️  OpenAI API error ({e}); retrying in {wait}s…", file=sys.stderr)
-            time.sleep(wait)
+            # Full-jitter exponential backoff, so concurrent retries don't re-collide;
+            # a Retry-After from the server takes precedence
+            retry_after = retry_after_seconds(e)
+            if retry_after is not None:
+                wait = retry_after
+            else:
+                wait = random.uniform(0, min(RETRY_BACKOFF_CAP_SEC, RETRY_BACKOFF_SEC * 2 ** attempt))
+            if retry_after is not None and limiter is not None:
+                limiter.pause(retry_after)
+            print(f"⚠️  OpenAI API error ({e}); retrying in {wait:.1f}s…", file=sys.stderr)
+            await asyncio.sleep(wait)
     # If it still hasn't returned, raise an exception
     raise RuntimeError("Failed to get response from OpenAI API after retries")
 
 
-def tag_item(client: OpenAI, item: Dict[str, Any], model: str, overwrite: bool = False) -> None:
-    """Classifies a single paper record and adds a 'tags' list to it."""
+def parse_tags(result_str: str) -> List[str]:
+    """Reads the tag list from the model's structured {"tags": [...]} answer, de-duplicated in order."""
+    return list(dict.fromkeys(json.loads(result_str)["tags"]))
+
+
+async def tag_item(client: Optional[AsyncOpenAI], item: Dict[str, Any], model: str, sem: asyncio.Semaphore,
+                   overwrite: bool = False, cache: Optional[TagCache] = None,
+                   limiter: Optional[RateLimiter] = None,
+                   max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> None:
+    """Classifies a single paper record and adds a 'tags' list to it (client=None uses the shared client)."""
     if not overwrite and "tags" in item:
         return
+    client = client or get_async_client()
+
+    messages = paper_messages(item, model, max_abstract_tokens)
+    async with sem:
+        result_str = await query_model(client, messages, model=model, cache=cache, limiter=limiter)
+    item["tags"] = parse_tags(result_str)
+
+
+async def tag_batch(client: Optional[AsyncOpenAI], items: List[Dict[str, Any]], model: str,
+                    sem: asyncio.Semaphore, cache: Optional[TagCache] = None,
+                    limiter: Optional[RateLimiter] = None,
+                    max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> None:
+    """
+    Tags several papers with a single request and adds a 'tags' list to each. Answers are
+    cached per paper under a "group" key, apart from one-paper answers, so runs with
+    different --papers-per-request settings stay comparable. Papers missing from the
+    answer, or all of them if the group request fails or its answer cannot be parsed,
+    are retried one at a time.
+    """
+    client = client or get_async_client()
+    keys = {}
+    pending = []
+    for item in items:
+        if cache is not None and len(items) > 1:
+            keys[id(item)] = cache.make_key(model, paper_messages(item, model, max_abstract_tokens), "group")
+            cached = cache.get(keys[id(item)])
+            if cached is not None:
+                item["tags"] = parse_tags(cached)
+                continue
+        pending.append(item)
+
+    if len(pending) > 1:
+        messages = build_group_prompt(pending, model, max_abstract_tokens)
+        tags_by_id: Dict[int, List[str]] = {}
+        try:
+            async with sem:
+                result_str = await query_model(client, messages, model=model, limiter=limiter,
+                                               response_format=RESULTS_RESPONSE_FORMAT,
+                                               completion_tokens=COMPLETION_TOKENS_ESTIMATE * len(pending))
+            for result in json.loads(result_str)["results"]:
+                tags_by_id.setdefault(result["id"], result["tags"])
+        except Exception as e:
+            # A failed or unparsable (e.g. truncated) group answer: retry every paper on its own
+            print(f"⚠️  Group request for {len(pending)} papers failed, retrying them one at a time: {e}",
+                  file=sys.stderr)
+            tags_by_id = {}
+        missing = []
+        for i, item in enumerate(pending, 1):
+            if not tags_by_id.get(i):
+                missing.append(item)
+                continue
+            item["tags"] = list(dict.fromkeys(tags_by_id[i]))
+            if cache is not None:
+                cache.put(keys[id(item)], json.dumps({"tags": item["tags"]}), model)
+        pending = missing
+
+    results = await asyncio.gather(
+        *(tag_item(client, item, model, sem, overwrite=True, cache=cache, limiter=limiter,
+                   max_abstract_tokens=max_abstract_tokens) for item in pending),
+        return_exceptions=True,
+    )
+    # One paper failing leaves the others tagged; the caller marks untagged papers as errors
+    for item, result in zip(pending, results):
+        if isinstance(result, Exception):
+            print(f"⚠️  Tagging failed for '{item.get('title', 'N/A')}', skipping: {result}", file=sys.stderr)
+
+
+def tag_batch_api(client: Optional[OpenAI], items: List[Dict[str, Any]], model: str,
+                  cache: Optional[TagCache] = None,
+                  max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS) -> None:
+    """
+    Tags papers through the OpenAI Batch API: uploads one JSONL request file, polls
+    until the batch finishes, and writes 'tags' into each item in place. Items whose
+    request failed get ["Error"], as in the concurrent path. Papers already answered
+    in the cache are not submitted. client=None uses the shared client.
+    """
+    client = client or get_client()
+    messages_by_url = {
+        item["url"]: paper_messages(item, model, max_abstract_tokens) for item in items
+    }
+    pending = []
+    for item in items:
+        cached = cache.get(cache.make_key(model, messages_by_url[item["url"]])) if cache else None
+        if cached is not None:
+            item["tags"] = parse_tags(cached)
+        else:
+            pending.append(item)
+    if not pending:
+        print("✓ All papers were answered from the cache.")
+        return
+    items = pending
+
+    batch_input_path = os.path.join(tempfile.gettempdir(), "tag_batch.jsonl")
+    with open(batch_input_path, "w", encoding="utf-8") as f:
+        for item in items:
+            request = {
+                "custom_id": item["url"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": messages_by_url[item["url"]],
+                    "temperature": 0.0,
+                    "response_format": TAGS_RESPONSE_FORMAT,
+                },
+            }
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+    with open(batch_input_path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} with {len(items)} requests; polling every {BATCH_POLL_SEC}s...")
+
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        time.sleep(BATCH_POLL_SEC)
+        batch = client.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        done = f"{counts.completed + counts.failed}/{counts.total}" if counts else "?"
+        print(f"  Batch {batch.id}: {batch.status} ({done} requests done)")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+    items_by_url = {item["url"]: item for item in items}
+    output = client.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        item = items_by_url.get(record["custom_id"])
+        if item is None:
+            continue
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            print(f"⚠️  Batch request failed for '{item.get('title', 'N/A')}', skipping: {record.get('error')}", file=sys.stderr)
+            item["tags"] = ["Error"]
+            continue
+        answer = response["body"]["choices"][0]["message"]["content"].strip()
+        item["tags"] = parse_tags(answer)
+        if cache is not None:
+            cache.put(cache.make_key(model, messages_by_url[item["url"]]), answer, model)
+
+    # Requests missing from the output file are treated as failures too
+    for item in items:
+        item.setdefault("tags", ["Error"])
+
+
+def _http_client_kwargs(jobs: int) -> Dict[str, Any]:
+    import httpx
+
+    return dict(
+        limits=httpx.Limits(max_connections=jobs * 2, max_keepalive_connections=jobs, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
 
-    messages = build_prompt(item["title"], item["abstract"])
-    result_str = query_model(client, messages, model=model)
 
-    # Split the comma-separated string and find all valid tags
-    raw_tags = [tag.strip() for tag in result_str.split(',')]
-    found_tags = []
-    for raw_tag in raw_tags:
-        for valid_tag in VALID_TAGS:
-            if valid_tag.lower() in raw_tag.lower() and valid_tag not in found_tags:
-                found_tags.append(valid_tag)
-    
-    if not found_tags:
-        found_tags.append("Other")
+def make_async_http_client(jobs: int) -> httpx.AsyncClient:
+    """
+    Builds the pooled transport for AsyncOpenAI: HTTP/2 when `h2` is installed, so the
+    in-flight requests multiplex over a few warm connections instead of paying a
+    TCP+TLS handshake per concurrent slot; HTTP/1.1 keep-alive otherwise.
+    """
+    import httpx
 
-    item["tags"] = found_tags
+    try:
+        return httpx.AsyncClient(http2=True, **_http_client_kwargs(jobs))
+    except ImportError:  # h2 not installed
+        return httpx.AsyncClient(**_http_client_kwargs(jobs))
+
+
+_client: Optional[OpenAI] = None
+# One shared async client per event loop; an entry goes away with its loop
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI] = weakref.WeakKeyDictionary()
+
+
+def get_client() -> OpenAI:
+    """
+    Returns the process-wide sync OpenAI client (HTTP/2 when available), creating it on
+    first use and closing it at exit, so repeated library calls reuse one warm pool.
+    """
+    global _client
+    if _client is None:
+        import httpx
+        from openai import OpenAI
+
+        try:
+            http_client = httpx.Client(http2=True, **_http_client_kwargs(SHARED_CLIENT_JOBS))
+        except ImportError:  # h2 not installed
+            http_client = httpx.Client(**_http_client_kwargs(SHARED_CLIENT_JOBS))
+        _client = OpenAI(http_client=http_client)
+        atexit.register(_client.close)
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Returns the shared AsyncOpenAI client of the running event loop, creating it on first
+    use. httpx connections cannot outlive the loop that opened them, so each loop gets its
+    own client; a caller that uses it should `await aclose_async_client()` before its loop
+    ends, or pass its own client to tag_item / tag_batch instead.
+    """
+    from openai import AsyncOpenAI
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncOpenAI(http_client=make_async_http_client(SHARED_CLIENT_JOBS))
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Closes the shared AsyncOpenAI client of the running event loop, if it has one."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+async def tag_all(items: List[Dict[str, Any]], model: str, jobs: int, cache: Optional[TagCache] = None,
+                  rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM,
+                  part_file: Optional[BinaryIO] = None,
+                  max_abstract_tokens: int = DEFAULT_MAX_ABSTRACT_TOKENS,
+                  papers_per_request: int = DEFAULT_PAPERS_PER_REQUEST) -> None:
+    """
+    Tags all items concurrently, up to papers_per_request papers per request and at most
+    `jobs` requests in flight, paced to the rpm/tpm rate limits; failures get ["Error"].
+    Each finished item is appended to part_file when one is given.
+    """
+    sem = asyncio.Semaphore(jobs)
+    limiter = RateLimiter(rpm, tpm)
+    completed = itertools.count(1)
+    total_to_process = len(items)
+
+    async def process(group: List[Dict[str, Any]]) -> None:
+        try:
+            await tag_batch(client, group, model, sem, cache=cache, limiter=limiter,
+                            max_abstract_tokens=max_abstract_tokens)
+        except Exception as e:
+            titles = ", ".join(f"'{item.get('title', 'N/A')}'" for item in group if "tags" not in item)
+            print(f"⚠️  Tagging failed for {titles}, skipping: {e}", file=sys.stderr)
+        for item in group:
+            item.setdefault("tags", ["Error"])
+            if part_file is not None:
+                append_part(part_file, item)
+            processed_count = next(completed)
+            if processed_count % 10 == 0 or processed_count == total_to_process:
+                print(f"  Processed {processed_count}/{total_to_process} papers...")
+
+    from openai import AsyncOpenAI
+
+    # The pool is sized to the concurrency so requests never queue on httpx's default 100-connection limit
+    async with make_async_http_client(jobs) as http_client:
+        client = AsyncOpenAI(http_client=http_client)
+        # Results are mutated directly into the items themselves; consuming them in completion
+        # order lets one slow paper hold up nothing but itself
+        groups = group_papers(items, model, papers_per_request, max_abstract_tokens)
+        tasks = [asyncio.create_task(process(group)) for group in groups]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                await finished
+        finally:
+            # On interruption, stop the in-flight requests before the client closes under them
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def mlc_accuracy(references: List[List[str]], predictions: List[List[str]]) -> float:
+    """Multi-label accuracy: the mean over papers of |reference ∩ predicted| / |reference ∪ predicted|."""
+    scores = [len(set(ref) & set(pred)) / len(set(ref) | set(pred)) for ref, pred in zip(references, predictions)]
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def ensure_api_key(key_file: str) -> None:
+    """Loads OPENAI_API_KEY from key_file into the environment if it isn't set; exits if no key is found."""
+    if not os.getenv("OPENAI_API_KEY"):
+        if os.path.isfile(key_file):
+            try:
+                with open(key_file, "r", encoding="utf-8") as kf:
+                    try:
+                        key_data = json.load(kf)
+                        api_key_val = (
+                            key_data.get("OPENAI_API_KEY")
+                            or key_data.get("api_key")
+                            or key_data.get("key")
+                        )
+                    except json.JSONDecodeError:
+                        kf.seek(0)
+                        api_key_val = kf.read().strip()
+                    if api_key_val:
+                        os.environ["OPENAI_API_KEY"] = api_key_val
+            except Exception as e:
+                print(f"⚠️  Failed to read API Key file: {e}", file=sys.stderr)
+
+    if not os.getenv("OPENAI_API_KEY"):
+        print(f"❌ OPENAI_API_KEY not found in environment variables or file (tried to read {key_file})", file=sys.stderr)
+        sys.exit(1)
+
+
+def evaluate_accuracy(args: argparse.Namespace) -> None:
+    """
+    Re-tags a fixed random sample of an already-tagged file with args.model, bypassing the
+    answer cache, and reports MLC-Acc.
+    """
+    if not os.path.isfile(args.eval_accuracy):
+        print(f"❌ Evaluation file not found: {args.eval_accuracy}", file=sys.stderr)
+        sys.exit(1)
+    labeled = [p for p in load_json(args.eval_accuracy) if p.get("tags") and "Error" not in p["tags"]]
+    sample = random.Random(0).sample(labeled, min(args.eval_sample, len(labeled)))
+    items = [{k: v for k, v in p.items() if k != "tags"} for p in sample]
+
+    ensure_api_key(args.api_key_file)
+    print(f"Evaluating {args.model} on {len(items)} papers from {args.eval_accuracy}...")
+    # No answer cache: the reference tags may themselves be cached answers, and reading
+    # them back would score the cache against itself instead of querying the model
+    asyncio.run(tag_all(items, args.model, args.jobs, cache=None, rpm=args.rpm, tpm=args.tpm,
+                        max_abstract_tokens=args.max_abstract_tokens,
+                        papers_per_request=args.papers_per_request))
+
+    scored = [(ref["tags"], item["tags"]) for ref, item in zip(sample, items) if item["tags"] != ["Error"]]
+    if len(scored) < len(items):
+        print(f"⚠️  {len(items) - len(scored)} papers failed to tag and are not scored.", file=sys.stderr)
+    references = [ref for ref, _ in scored]
+    predictions = [pred for _, pred in scored]
+    exact = sum(set(ref) == set(pred) for ref, pred in scored) / len(scored) if scored else 0.0
+    print(f"✓ MLC-Acc: {mlc_accuracy(references, predictions):.3f}  (exact match: {exact:.3f}, n={len(scored)})")
 
 
 # ------------------------------ Main Function -----------------------------------
@@ -158,27 +874,49 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Tag papers with 1-3 sub-topics using an OpenAI model")
     parser.add_argument("--input", default=DEFAULT_INPUT, help="Path to the input JSON file of filtered papers")
     parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Path to the output JSON file with tagged papers")
-    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"OpenAI model name (default: {DEFAULT_MODEL})")
+    model_group = parser.add_mutually_exclusive_group()
+    model_group.add_argument("--model", help=f"OpenAI model name (default: {DEFAULT_MODEL})")
+    model_group.add_argument("--tier", choices=sorted(MODEL_TIERS),
+                             help="'fast' = " + MODEL_TIERS["fast"] + " (default), 'accurate' = " + MODEL_TIERS["accurate"])
+    parser.add_argument("--cache-file", default=DEFAULT_CACHE_FILE,
+                        help=f"sqlite cache of model answers (default: {DEFAULT_CACHE_FILE}; '' disables)")
+    parser.add_argument("--papers-per-request", type=int, default=DEFAULT_PAPERS_PER_REQUEST,
+                        help=f"Papers tagged per chat request (default: {DEFAULT_PAPERS_PER_REQUEST}; 1 = one each)")
+    parser.add_argument("--max-abstract-tokens", type=int, default=DEFAULT_MAX_ABSTRACT_TOKENS,
+                        help=f"Truncate abstracts to this many tokens (default: {DEFAULT_MAX_ABSTRACT_TOKENS}; 0 = no limit)")
     parser.add_argument("--jobs", "-j", type=int, default=20, help="Number of concurrent API requests (default: 20)")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_RPM,
+                        help=f"Starting requests-per-minute budget, refined from response headers (default: {DEFAULT_RPM})")
+    parser.add_argument("--tpm", type=float, default=DEFAULT_TPM,
+                        help=f"Starting tokens-per-minute budget, refined from response headers (default: {DEFAULT_TPM})")
     parser.add_argument("--api-key-file", default=DEFAULT_API_KEY_FILE,
                         help=f"Path to file containing OpenAI API Key (default: {DEFAULT_API_KEY_FILE})")
     parser.add_argument("--overwrite", action="store_true", help="Force re-tagging all papers, ignoring existing ones")
+    parser.add_argument("--batch", action="store_true",
+                        help=f"Use the OpenAI Batch API (only when at least {BATCH_MIN_ITEMS} papers need tagging)")
+    parser.add_argument("--eval-accuracy", metavar="FILE",
+                        help="Report the multi-label accuracy against the tags already in FILE, then exit (always queries the model; the answer cache is not used)")
+    parser.add_argument("--eval-sample", type=int, default=DEFAULT_EVAL_SAMPLE,
+                        help=f"Papers sampled for --eval-accuracy (default: {DEFAULT_EVAL_SAMPLE})")
 
     args = parser.parse_args()
+    args.model = args.model or MODEL_TIERS[args.tier or "fast"]
+
+    if args.eval_accuracy:
+        evaluate_accuracy(args)
+        return
 
     # --- Load Input Data ---
     if not os.path.isfile(args.input):
         print(f"❌ Input file not found: {args.input}", file=sys.stderr)
         sys.exit(1)
-    with open(args.input, "r", encoding="utf-8") as f:
-        all_papers = json.load(f)
+    all_papers = load_json(args.input)
 
     # --- Load Existing Tagged Data (if any) ---
     existing_papers = []
     if not args.overwrite and os.path.isfile(args.output):
         try:
-            with open(args.output, "r", encoding="utf-8") as f:
-                existing_papers = json.load(f)
+            existing_papers = load_json(args.output)
         except (json.JSONDecodeError, IOError) as e:
             print(f"⚠️  Could not read existing output file, will overwrite it. Reason: {e}", file=sys.stderr)
 
@@ -187,72 +925,90 @@ def main() -> None:
         items_to_process = all_papers
         print(f"⚠️  --overwrite flag is set. Re-tagging all {len(all_papers)} papers from input.")
     else:
-        existing_urls = {item.get("url") for item in existing_papers if item.get("url")}
+        existing_urls = frozenset(filter(None, (item.get("url") for item in existing_papers)))
         items_to_process = [item for item in all_papers if item.get("url") not in existing_urls]
 
+    # Papers tagged by an interrupted run take precedence over the last complete output
+    part_path = args.output + PART_SUFFIX
+    resumed = load_part(part_path)
+    if resumed:
+        print(f"Resuming: {len(resumed)} papers already tagged in {part_path}")
+        resumed_urls = frozenset(item.get("url") for item in resumed)
+        existing_papers = [item for item in existing_papers if item.get("url") not in resumed_urls] + resumed
+        items_to_process = skip_resumed(items_to_process, resumed)
+
+    # --- Collapse Duplicates ---
+    # The same paper can appear under several URLs (versions, mirrors); tag one copy per group
+    groups: Dict[bytes, List[Dict[str, Any]]] = collections.defaultdict(list)
+    for item in items_to_process:
+        groups[content_key(item)].append(item)
+    unique_items = [group[0] for group in groups.values()]
+    if len(unique_items) < len(items_to_process):
+        print(f"Skipping {len(items_to_process) - len(unique_items)} duplicate papers; "
+              f"their tags are copied from the identical paper.")
+
     # --- Prepare OpenAI API Key ---
     if items_to_process:
-        if not os.getenv("OPENAI_API_KEY"):
-            key_file = args.api_key_file
-            if os.path.isfile(key_file):
-                try:
-                    with open(key_file, "r", encoding="utf-8") as kf:
-                        try:
-                            key_data = json.load(kf)
-                            api_key_val = (
-                                key_data.get("OPENAI_API_KEY")
-                                or key_data.get("api_key")
-                                or key_data.get("key")
-                            )
-                        except json.JSONDecodeError:
-                            kf.seek(0)
-                            api_key_val = kf.read().strip()
-                        if api_key_val:
-                            os.environ["OPENAI_API_KEY"] = api_key_val
-                except Exception as e:
-                    print(f"⚠️  Failed to read API Key file: {e}", file=sys.stderr)
-
-        if not os.getenv("OPENAI_API_KEY"):
-            print(f"❌ OPENAI_API_KEY not found in environment variables or file (tried to read {args.api_key_file})", file=sys.stderr)
-            sys.exit(1)
-
-    client = OpenAI()
+        ensure_api_key(args.api_key_file)
 
     # --- Tag New Papers ---
+    cache = TagCache(args.cache_file) if args.cache_file and items_to_process else None
+    part_file = open(part_path, "ab") if items_to_process else None
     if not items_to_process:
         print("✓ No new papers to tag.")
         final_data = existing_papers
+    elif args.batch and len(unique_items) >= BATCH_MIN_ITEMS:
+        print(f"Found {len(unique_items)} new papers to tag. Using the OpenAI Batch API...")
+        try:
+            tag_batch_api(get_client(), unique_items, args.model, cache=cache,
+                          max_abstract_tokens=args.max_abstract_tokens)
+        except Exception as e:
+            # Nothing has been written yet, so the next run will simply retry these papers
+            print(f"❌ Batch tagging failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        for item in unique_items:
+            append_part(part_file, item)
     else:
-        print(f"Found {len(items_to_process)} new papers to tag. Using {args.jobs} concurrent workers...")
-        processed_count = 0
-        total_to_process = len(items_to_process)
-        lock = threading.Lock()
+        print(f"Found {len(unique_items)} new papers to tag. Using up to {args.jobs} concurrent requests...")
+        try:
+            asyncio.run(tag_all(unique_items, args.model, args.jobs, cache=cache, rpm=args.rpm, tpm=args.tpm,
+                                part_file=part_file, max_abstract_tokens=args.max_abstract_tokens,
+                                papers_per_request=args.papers_per_request))
+        except KeyboardInterrupt:
+            # Every finished paper is already in the part file; the next run resumes from it
+            part_file.close()
+            if cache is not None:
+                cache.close()
+            print(f"\n⚠️  Interrupted. Completed tags are kept in {part_path}; rerun to resume.", file=sys.stderr)
+            sys.exit(130)
+
+    if items_to_process:
+        for group in groups.values():
+            for duplicate in group[1:]:
+                duplicate["tags"] = list(group[0]["tags"])
+                append_part(part_file, duplicate)
 
-        def process_wrapper(item: Dict[str, Any]) -> None:
-            nonlocal processed_count
-            try:
-                tag_item(client, item, args.model, overwrite=True)  # Always overwrite as we only process new items
-            except Exception as e:
-                print(f"⚠️  Tagging failed for '{item.get('title', 'N/A')}', skipping: {e}", file=sys.stderr)
-                item["tags"] = ["Error"]
-            finally:
-                with lock:
-                    processed_count += 1
-                    if processed_count % 10 == 0 or processed_count == total_to_process:
-                        print(f"  Processed {processed_count}/{total_to_process} papers...")
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
-            executor.map(process_wrapper, items_to_process)
-        
         # Combine and set final data
         final_data = existing_papers + items_to_process
 
+    if cache is not None:
+        cache.close()
+    if part_file is not None:
+        part_file.close()
+
     # --- Sort and Save ---
     print("Sorting all papers by publication date...")
-    final_data.sort(key=lambda x: x.get("published", ""), reverse=True)
-
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
+    # Newest first (ISO 8601 strings sort lexicographically); records without a date go last
+    for item in final_data:
+        item.setdefault("published", "")
+    final_data.sort(key=itemgetter("published"), reverse=True)
+
+    # Replace the output atomically; only then is the part file redundant
+    tmp_path = args.output + ".tmp"
+    dump_json(final_data, tmp_path, fsync=True)
+    os.replace(tmp_path, args.output)
+    if os.path.exists(part_path):
+        os.unlink(part_path)
 
     print(f"✓ Tagging complete. Total {len(final_data)} papers saved to → {args.output}")
 